@@ -1,27 +1,49 @@
 import os
 import streamlit as st
 import json
-import re
-import shutil
-import streamlit as st
+import io
+import zipfile
 from pathlib import Path
-from dotenv import load_dotenv
 
 # Import the new website generator pipeline
-from src.website_generator import generate_website_files
-from src.ai_utils import call_gemini
+from src.website_generator import INPUTS_MARKER, generate_website_files
+from src.ai_utils import call_gemini_stream, cache_stats
 from src.preview_server import show_preview_interface
+from src.config import get_config
+from src.prompts import DATA_EXTRACTION_PROMPT, DATA_EXTRACTION_SYSTEM_PROMPT, SITE_DATA_SCHEMA, MAX_OUTPUT_TOKENS
+
+
+# Installed packages and build output are reproducible from package.json
+EXCLUDED_DIRS = {"node_modules", ".next"}
+# Generator bookkeeping: the inputs marker, partial streams and unusable raw responses
+EXCLUDED_SUFFIXES = (INPUTS_MARKER, ".part", ".raw.txt")
 
-PROJECT_ID = os.environ.get("PROJECT_ID")
-LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION", "us-central1")
-MODEL = os.environ.get("MODEL", "gemini-2.5-flash")
 
-if not PROJECT_ID:
-    raise ValueError("PROJECT_ID environment variable not set")
+def iter_site_files(root: Path):
+    """Yield the generated source files under root, skipping EXCLUDED_DIRS and generator bookkeeping"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+        for filename in sorted(filenames):
+            if filename.endswith(EXCLUDED_SUFFIXES):
+                continue
+            yield Path(dirpath) / filename
+
+
+# Only the latest archive is ever offered, so older ones need not stay in memory
+@st.cache_data(show_spinner=False, max_entries=1)
+def zip_tree(root: str, mtime_sig: float) -> bytes:
+    """Zip a directory in memory; mtime_sig changes whenever the tree does, invalidating the cache"""
+    root_path = Path(root)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for path in iter_site_files(root_path):
+            zf.write(path, path.relative_to(root_path))
+    return buf.getvalue()
 
 
 # ---------- STREAMLIT UI ----------
 st.set_page_config(layout="wide")
+get_config()  # Fail fast on missing settings before rendering anything else
 st.title("AI-Powered Artisan Website Generator")
 
    
@@ -35,65 +57,63 @@ desc = st.text_area(
                 "Contact me at sarah@pottery.com.'"
 )
 
+batch = st.checkbox(
+    "Generate all files in a single request",
+    help="Sends the site data once and returns every file in one JSON response. "
+         "Files it misses are generated individually."
+)
+
 if st.button("Generate Website Files"):
     if not desc.strip():
         st.error("Please provide a description for your business.")
-    elif not os.getenv("PROJECT_ID"):
-        st.error("Please set your Google Cloud Project ID in environment variables.")
     else:
         # Create progress bar and status text
         progress_bar = st.progress(0)
         status_text = st.empty()
         
         try:
-            from src.ai_utils import call_gemini
-            from src.prompts import DATA_EXTRACTION_PROMPT
-
-           
-            
-            site_data_raw = call_gemini(
-                prompt=DATA_EXTRACTION_PROMPT.format(description=desc),
-                system_prompt="Return strictly valid JSON. Include all requested fields completely."
-            )
-
-             # Step 1: Call AI for JSON output
+            # Step 1: Call AI for JSON output, streaming tokens as they arrive
             status_text.text("Step 1: Analyzing business description...")
             progress_bar.progress(10)
 
-            
-            
-            cleaned_output = site_data_raw.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
-            match = re.search(r"\{.*\}", cleaned_output, re.S)
-            if not match:
-                raise ValueError("No JSON object found")
-            site_data_parsed = json.loads(match.group(0))
-
-            
-            
-            data_file = Path("generated_website/src/data/products.json")
-            data_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(data_file, "w", encoding="utf-8") as f:
-                json.dump(site_data_parsed, f, indent=2)
-
-            # Step 4: Generate website files with detailed progress
+            stream_placeholder = st.empty()
+            site_data_raw = ""
+            for chunk in call_gemini_stream(
+                prompt=DATA_EXTRACTION_PROMPT,
+                system_prompt=DATA_EXTRACTION_SYSTEM_PROMPT,
+                max_output_tokens=MAX_OUTPUT_TOKENS["data_extraction"],
+                temperature=0.2,
+                response_mime_type="application/json",
+                response_schema=SITE_DATA_SCHEMA,
+                cache=True,
+                prompt_vars={"description": desc}
+            ):
+                site_data_raw += chunk
+                stream_placeholder.code(site_data_raw, language="json")
+            stream_placeholder.empty()
+
+            site_data_parsed = json.loads(site_data_raw)
+
+            # Step 2: Generate website files (including products.json) with per-file progress
             status_text.text("Step 2: Generating website components...")
             progress_bar.progress(20)
             
             def website_progress_callback(current_step, total_steps, step_description):
-                # Map website generation progress from 80% to 95%
-                base_progress = 80
-                step_range = 15  # 15% allocated for website generation
+                # Map website generation progress from 20% to 95%
+                base_progress = 20
+                step_range = 75  # 75% allocated for website generation
                 step_progress = (current_step / total_steps) * step_range
                 new_progress = int(base_progress + step_progress)
                 
                 progress_bar.progress(new_progress)
-                status_text.text(f"Step 4/5: {step_description}")
+                status_text.text(f"Step 2: {step_description}")
             
             output_dir = generate_website_files(
-                site_data_raw=json.dumps(site_data_parsed, indent=2),
+                site_data=site_data_parsed,
                 user_prompt=desc,
                 output_path="generated_website",
-                progress_callback=website_progress_callback
+                progress_callback=website_progress_callback,
+                batch=batch
             )
 
             # Step 5: Complete
@@ -110,23 +130,15 @@ if st.button("Generate Website Files"):
 
 
             output_dir = Path("generated_website")
-            zip_path = Path("generated_website.zip")
-
-            # Remove old zip if exists
-            if zip_path.exists():
-                zip_path.unlink()
-
-            # Create a zip of the generated folder
-            shutil.make_archive("generated_website", 'zip', output_dir)
+            mtime_sig = max((p.stat().st_mtime for p in iter_site_files(output_dir)), default=0.0)
 
             # Provide download button
-            with open(zip_path, "rb") as f:
-                st.download_button(
-                    label="Download Generated Website",
-                    data=f,
-                    file_name="generated_website.zip",
-                    mime="application/zip"
-                )
+            st.download_button(
+                label="Download Generated Website",
+                data=zip_tree(str(output_dir), mtime_sig),
+                file_name="generated_website.zip",
+                mime="application/zip"
+            )
 
 
             st.header("Next Steps: Build")
@@ -147,3 +159,11 @@ if st.button("Generate Website Files"):
 if Path("generated_website").exists():
     st.markdown("---")
     show_preview_interface()
+
+# Rendered last so the counters include this run's calls
+with st.sidebar:
+    st.subheader("Response cache")
+    stats = cache_stats()
+    st.metric("Hits", stats["hits"])
+    st.metric("Misses", stats["misses"])
+    st.caption(f"Evictions: {stats['evictions']}")
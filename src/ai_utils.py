@@ -1,30 +1,295 @@
-import os
-from dotenv import load_dotenv
+import contextlib
+import json
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+import streamlit as st
 from google import genai
 from google.genai import types
 
-PROJECT_ID = os.environ.get("PROJECT_ID")
-LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION", "us-central1")
-MODEL = os.environ.get("MODEL", "gemini-2.5-pro")
+from src.config import get_config
 
-if not PROJECT_ID:
-    raise ValueError("PROJECT_ID environment variable not set")
-if not PROJECT_ID or PROJECT_ID == "YOUR_GOOGLE_CLOUD_PROJECT_ID":
-    raise ValueError("PROJECT_ID not set. Set it in your .env file.")
+logger = logging.getLogger(__name__)
 
-client = genai.Client(vertexai=True, project=PROJECT_ID, location=LOCATION)
+# Async client of the running async_client_session()
+_async_client: ContextVar = ContextVar("async_client", default=None)
 
-def call_gemini(prompt: str, system_prompt: str = None, max_output_tokens: int = 8024, temperature: float = 0.4) -> str:
-    full_prompt = f"{system_prompt}\n{prompt}" if system_prompt else prompt
+CACHE_PATH = Path.home() / ".cache" / "gen-ai-hackathon" / "llm_cache.sqlite3"
+# Above this temperature responses are meant to vary, so callers must opt in to caching
+CACHE_MAX_TEMPERATURE = 0.1
+# Entries expire this long after being written, and the cache keeps at most
+# CACHE_MAX_ENTRIES rows, evicting the least recently used first
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+CACHE_MAX_ENTRIES = 5000
+CONTEXT_CACHE_TTL_SECONDS = 3600
+# Vertex AI rejects cached contents below this size
+MIN_CONTEXT_CACHE_TOKENS = 2048
 
+class LLMCache:
+    """Response cache persisted in SQLite, keyed by a hash of the full request"""
+
+    def __init__(self, path: Path, ttl: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _evict(self, now: float):
+        """Drop expired rows, then the least recently used ones beyond max_entries"""
+        expired = self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self._ttl,)).rowcount
+        overflow = self._conn.execute(
+            "DELETE FROM responses WHERE rowid IN (SELECT rowid FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        ).rowcount
+        self.stats["evictions"] += expired + overflow
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ? AND created >= ?", (key, now - self._ttl)).fetchone()
+            if row:
+                self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.stats["hits" if row else "misses"] += 1
+        return row[0] if row else None
+
+    def set(self, key: str, response: str):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._evict(now)
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM responses WHERE key = ? AND created >= ?", (key, time.time() - self._ttl)).fetchone()
+        return row is not None
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+@st.cache_resource(show_spinner=False)
+def get_llm_cache() -> LLMCache:
+    return LLMCache(CACHE_PATH)
+
+def cache_stats() -> dict:
+    """Hit/miss counters for the response cache since the process started"""
+    return dict(get_llm_cache().stats)
+
+@st.cache_resource
+def get_genai_client() -> genai.Client:
+    """Create the Vertex AI client for synchronous calls once per process and reuse it across reruns"""
+    config = get_config()
+    return genai.Client(vertexai=True, project=config.project_id, location=config.location)
+
+@contextlib.asynccontextmanager
+async def async_client_session():
+    """Give async calls made inside this block their own client, closed on exit.
+
+    An async connection pool belongs to the event loop that opened it. Each
+    asyncio.run() gets a new loop, so sharing the process-wide client across runs
+    would reuse connections whose loop is already closed.
+    """
+    config = get_config()
+    client = genai.Client(vertexai=True, project=config.project_id, location=config.location)
+    token = _async_client.set(client.aio)
+    try:
+        yield
+    finally:
+        _async_client.reset(token)
+        await client.aio.aclose()
+
+def _get_async_client():
+    client = _async_client.get()
+    if client is None:
+        raise RuntimeError("Async Gemini calls must run inside async_client_session()")
+    return client
+
+def can_cache_context(system_prompt: str, context: str = None) -> bool:
+    """Whether a prefix is large enough for Vertex AI context caching, at ~4 characters per token"""
+    return (len(system_prompt) + len(context or "")) // 4 >= MIN_CONTEXT_CACHE_TOKENS
+
+@st.cache_resource(ttl=CONTEXT_CACHE_TTL_SECONDS - 60, show_spinner=False)
+def create_context_cache(system_prompt: str, context: str = None, model: str = None) -> str:
+    """Upload a shared prompt prefix once as Vertex AI cached content and return its name.
+
+    Calls that pass the name as cached_content are billed and prefilled only for their
+    own suffix. Returns None when the prefix is too small to cache or creation fails,
+    in which case callers send the prefix inline as usual.
+    """
+    # Avoids a round-trip for prefixes that cannot qualify
+    if not can_cache_context(system_prompt, context):
+        return None
+    try:
+        cached = get_genai_client().caches.create(
+            model=model or get_config().model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=system_prompt,
+                contents=[types.Content(role="user", parts=[types.Part(text=context)])] if context else None,
+                ttl=f"{CONTEXT_CACHE_TTL_SECONDS}s",
+            ),
+        )
+    except Exception as e:
+        logger.warning(f"Context cache creation failed, sending prompts inline: {e}")
+        return None
+    return cached.name
+
+def _build_config(system_prompt: str, max_output_tokens: int, temperature: float, response_mime_type: str, response_schema: dict, cached_content: str = None):
+    """Build the generation config shared by every call path.
+
+    The system prompt goes in system_instruction rather than being prepended to the
+    prompt, so requests sharing it also share a cacheable prefix on Vertex AI. With
+    cached_content the system prompt already lives in the cache and must be omitted.
+    """
     generation_config = types.GenerateContentConfig(
+        system_instruction=None if cached_content else system_prompt,
+        cached_content=cached_content,
         temperature=temperature,
-        max_output_tokens=max_output_tokens
+        max_output_tokens=max_output_tokens,
+        response_mime_type=response_mime_type,
+        response_schema=response_schema
     )
+    return generation_config
+
+def _contents(prompt: str, context: str = None, cached_content: str = None) -> list:
+    """Send context ahead of the prompt unless cached_content already holds it"""
+    return [{"text": prompt if cached_content or not context else context + prompt}]
 
-    response = client.models.generate_content(
-        model=MODEL,
-        contents=[{"text": full_prompt}],
+def _cache_key(cache: bool, prompt: str, system_prompt: str, max_output_tokens: int, temperature: float, response_mime_type: str, response_schema: dict, cached_content: str = None, model: str = None, context: str = None, prompt_vars: dict = None):
+    """Return the response-cache key for a request, or None if it should bypass the cache.
+
+    With context the key covers that text rather than the server-assigned cached_content
+    name, which changes whenever the context cache is recreated. prompt_vars are hashed
+    as their own part, next to prompt as the unrendered template.
+    """
+    if cache is None:
+        cache = temperature <= CACHE_MAX_TEMPERATURE
+    if not cache or not get_config().response_cache:
+        return None
+    return LLMCache.make_key(
+        model=model or get_config().model,
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,
+        system_prompt=system_prompt,
+        prompt=prompt,
+        response_mime_type=response_mime_type,
+        response_schema=response_schema,
+        cached_content=cached_content if context is None else None,
+        context=context,
+        prompt_vars=prompt_vars,
+    )
+
+def has_cached_response(prompt: str, system_prompt: str = None, max_output_tokens: int = 8024, temperature: float = 0.4, response_mime_type: str = None, response_schema: dict = None, cache: bool = None, cached_content: str = None, model: str = None, context: str = None) -> bool:
+    """Whether a request would be served from the response cache, without counting a hit or miss"""
+    key = _cache_key(cache, prompt, system_prompt, max_output_tokens, temperature, response_mime_type, response_schema, cached_content, model, context)
+    return key is not None and get_llm_cache().contains(key)
+
+def invalidate_cached_response(prompt: str, system_prompt: str = None, max_output_tokens: int = 8024, temperature: float = 0.4, response_mime_type: str = None, response_schema: dict = None, cache: bool = None, cached_content: str = None, model: str = None, context: str = None):
+    """Drop the stored response for a request, e.g. when its output turned out to be unusable"""
+    key = _cache_key(cache, prompt, system_prompt, max_output_tokens, temperature, response_mime_type, response_schema, cached_content, model, context)
+    if key is not None:
+        get_llm_cache().delete(key)
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+def _lookup_cache(key: str):
+    return get_llm_cache().get(key) if key else None
+
+def _store_cache(key: str, response: str, response_mime_type: str = None):
+    if not key or not response:
+        return
+    if response_mime_type == "application/json":
+        # A response cut off at max_output_tokens (thinking tokens count too) would
+        # otherwise be replayed on every retry until it expires
+        try:
+            json.loads(response)
+        except ValueError:
+            logger.warning("Not caching a JSON response that does not parse")
+            return
+    get_llm_cache().set(key, response)
+
+def call_gemini_stream(prompt: str, system_prompt: str = None, max_output_tokens: int = 8024, temperature: float = 0.4, response_mime_type: str = None, response_schema: dict = None, cache: bool = None, prompt_vars: dict = None, cached_content: str = None, model: str = None):
+    """Yield response text chunks as Gemini produces them; a cached response arrives as one chunk.
+
+    With prompt_vars, prompt is a str.format template for free text such as the
+    business description. The cache key covers the template and the values with
+    whitespace and letter case normalized, so trivially different inputs share a response.
+    """
+    key_vars = {name: _normalize_text(value) for name, value in prompt_vars.items()} if prompt_vars else None
+    key = _cache_key(cache, prompt, system_prompt, max_output_tokens, temperature, response_mime_type, response_schema, cached_content, model, prompt_vars=key_vars)
+    if prompt_vars:
+        prompt = prompt.format(**prompt_vars)
+    cached = _lookup_cache(key)
+    if cached is not None:
+        yield cached
+        return
+    generation_config = _build_config(system_prompt, max_output_tokens, temperature, response_mime_type, response_schema, cached_content)
+
+    chunks = []
+    for chunk in get_genai_client().models.generate_content_stream(
+        model=model or get_config().model,
+        contents=[{"text": prompt}],
+        config=generation_config
+    ):
+        if chunk.text:
+            chunks.append(chunk.text)
+            yield chunk.text
+    _store_cache(key, "".join(chunks), response_mime_type)
+
+async def call_gemini_async(prompt: str, system_prompt: str = None, max_output_tokens: int = 8024, temperature: float = 0.4, response_mime_type: str = None, response_schema: dict = None, cache: bool = None, cached_content: str = None, model: str = None, context: str = None) -> str:
+    """Return the whole response without blocking, so independent requests can run concurrently.
+
+    context is a shared prefix sent ahead of prompt; when cached_content is given it
+    must hold exactly that text, and only prompt is sent.
+    """
+    key = _cache_key(cache, prompt, system_prompt, max_output_tokens, temperature, response_mime_type, response_schema, cached_content, model, context)
+    cached = _lookup_cache(key)
+    if cached is not None:
+        return cached
+    generation_config = _build_config(system_prompt, max_output_tokens, temperature, response_mime_type, response_schema, cached_content)
+
+    response = await _get_async_client().models.generate_content(
+        model=model or get_config().model,
+        contents=_contents(prompt, context, cached_content),
         config=generation_config
     )
+    _store_cache(key, response.text, response_mime_type)
     return response.text
+
+async def call_gemini_stream_async(prompt: str, system_prompt: str = None, max_output_tokens: int = 8024, temperature: float = 0.4, response_mime_type: str = None, response_schema: dict = None, cache: bool = None, cached_content: str = None, model: str = None, context: str = None):
+    """Async variant of call_gemini_stream; a cached response arrives as one chunk"""
+    key = _cache_key(cache, prompt, system_prompt, max_output_tokens, temperature, response_mime_type, response_schema, cached_content, model, context)
+    cached = _lookup_cache(key)
+    if cached is not None:
+        yield cached
+        return
+    generation_config = _build_config(system_prompt, max_output_tokens, temperature, response_mime_type, response_schema, cached_content)
+
+    chunks = []
+    async for chunk in await _get_async_client().models.generate_content_stream(
+        model=model or get_config().model,
+        contents=_contents(prompt, context, cached_content),
+        config=generation_config
+    ):
+        if chunk.text:
+            chunks.append(chunk.text)
+            yield chunk.text
+    _store_cache(key, "".join(chunks), response_mime_type)
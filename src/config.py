@@ -0,0 +1,38 @@
+import os
+from dataclasses import dataclass
+import streamlit as st
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class Config:
+    project_id: str
+    location: str
+    model: str
+    # Cheaper model for small, formulaic artifacts
+    fast_model: str
+    # WEBGEN_NO_CACHE=1 bypasses the persistent response cache entirely
+    response_cache: bool
+    # Upper bound on concurrent Gemini requests during site generation
+    gemini_concurrency: int
+
+
+@st.cache_resource(show_spinner=False)
+def get_config() -> Config:
+    """Load .env and read settings once per process instead of on every rerun"""
+    load_dotenv()
+    project_id = os.environ.get("PROJECT_ID")
+    if not project_id or project_id == "YOUR_GOOGLE_CLOUD_PROJECT_ID":
+        raise ValueError("PROJECT_ID not set. Set it in your .env file.")
+    gemini_concurrency = os.environ.get("GEMINI_CONCURRENCY", "8").strip()
+    # Semaphore(0) would block every request forever
+    if not gemini_concurrency.isdigit() or int(gemini_concurrency) < 1:
+        raise ValueError("GEMINI_CONCURRENCY must be a positive integer.")
+    return Config(
+        project_id=project_id,
+        location=os.environ.get("GOOGLE_CLOUD_LOCATION", "us-central1"),
+        model=os.environ.get("MODEL", "gemini-2.5-pro"),
+        fast_model=os.environ.get("FAST_MODEL", "gemini-2.5-flash"),
+        response_cache=os.environ.get("WEBGEN_NO_CACHE", "") not in ("1", "true", "yes"),
+        gemini_concurrency=int(gemini_concurrency),
+    )
@@ -1,11 +1,12 @@
+import socket
 import subprocess
-import threading
 import time
-import requests
 from pathlib import Path
 import streamlit as st
-import json
-import base64
+
+PREVIEW_PORT = 3001
+# Seconds to wait for `npm run dev` to bind the port
+READY_TIMEOUT = 15
 
 class PreviewServer:
     def __init__(self):
@@ -13,16 +14,33 @@ class PreviewServer:
         self.local_url = None
 
     def start_preview(self, output_dir):
-        """Start the local preview server"""
+        """Start the local preview server and return its URL once it accepts connections"""
+        # Output is discarded: an undrained PIPE fills up and stalls the dev server
         self.process = subprocess.Popen(
             ["npm", "run", "dev"],
             cwd=output_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
         )
-        self.local_url = "http://localhost:3001"
+        if not self._wait_until_ready():
+            self.stop_preview()
+            return None
+        self.local_url = f"http://localhost:{PREVIEW_PORT}"
         return self.local_url
 
+    def _wait_until_ready(self, timeout: float = READY_TIMEOUT) -> bool:
+        """Poll the preview port until it accepts a TCP connection or the process exits"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                return False
+            try:
+                with socket.create_connection(("localhost", PREVIEW_PORT), timeout=0.25):
+                    return True
+            except OSError:
+                time.sleep(0.25)
+        return False
+
     def stop_preview(self):
         """Stop the local preview server"""
         if self.process:
@@ -37,30 +55,31 @@ class PreviewServer:
             "local_url": self.local_url if is_running else None
         }
 
+@st.cache_resource(show_spinner=False)
+def get_preview_server() -> PreviewServer:
+    """One preview server per process; it owns port 3001, so sessions share it"""
+    return PreviewServer()
+
+def _start_preview_clicked():
+    output_dir = Path("generated_website")
+    if not output_dir.exists():
+        st.session_state.preview_error = "No generated website found. Please generate a website first."
+    elif not get_preview_server().start_preview(output_dir):
+        st.session_state.preview_error = f"Preview server did not start listening on port {PREVIEW_PORT} within {READY_TIMEOUT}s."
+
 def show_preview_interface():
     """Streamlit interface for local preview functionality"""
-    if "preview_server" not in st.session_state:
-        st.session_state.preview_server = PreviewServer()
-    
-    preview_server = st.session_state.preview_server
+    # Buttons use on_click callbacks, which run before the script reruns, so the
+    # status below already reflects the action without an extra st.rerun()
+    preview_server = get_preview_server()
     status = preview_server.get_status()
     
     st.header("🌐 Local Website Preview")
     
     if not status["is_running"]:
-        if st.button("🚀 Start Local Preview", type="primary"):
-            output_dir = Path("generated_website")
-            if output_dir.exists():
-                local_url = preview_server.start_preview(output_dir)
-                if local_url:
-                    st.success(f"Preview is running locally! 🎉")
-                    st.markdown(f"**Local URL:** {local_url}")
-                    st.info("💡 Click the URL above to open the preview in a new tab")
-                    
-                    # Auto-refresh to update status
-                    st.rerun()
-            else:
-                st.error("No generated website found. Please generate a website first.")
+        st.button("🚀 Start Local Preview", type="primary", on_click=_start_preview_clicked)
+        if error := st.session_state.pop("preview_error", None):
+            st.error(error)
     else:
         # Server is running
         col1, col2 = st.columns([3, 1])
@@ -71,12 +90,10 @@ def show_preview_interface():
             st.info("💡 Click the URL above to open the preview in your browser")
         
         with col2:
-            if st.button("🛑 Stop Preview", type="secondary"):
-                preview_server.stop_preview()
-                st.rerun()
+            st.button("🛑 Stop Preview", type="secondary", on_click=preview_server.stop_preview)
             
-            if st.button("🔄 Refresh Status", type="secondary"):
-                st.rerun()
+            # Any click reruns the script, which re-reads the status
+            st.button("🔄 Refresh Status", type="secondary")
     
     # Show requirements
     with st.expander("📋 Requirements"):
@@ -1,20 +1,19 @@
 # prompts.py
 
-DATA_EXTRACTION_PROMPT = '''
-You are a data analyst. 
-A local artisan has provided a description of their business:
-"{description}"
-
-Extract structured data and return it as a single valid JSON object only.
+# Output budgets per artifact. Gemini 2.5 counts thinking tokens against
+# max_output_tokens, so each limit leaves headroom above the visible output.
+MAX_OUTPUT_TOKENS = {
+    "data_extraction": 8192,
+    "component": 8192,
+    "page": 8192,
+    "layout": 4096,
+    "globals_css": 4096,
+}
 
-Schema (required top-level keys):
--DO NOT ADD ''json fences at the start or end of the code.
-- artisanInfo: object {{ name: string, story: string, contact: string (extract email/phone if mentioned, otherwise use "contact@[businessname].com" format), address: string (if mentioned, otherwise generate realistic address), phone: string (if mentioned, otherwise generate format like "+1-XXX-XXX-XXXX") }}
-- products: array of objects {{ id: string, name: string, description: string, price: string, category: string, imageUrl: string (use "/images/products/[product-name].jpg" format) }}
-- galleryItems: array of objects {{ id: string, name: string, description: string, imageUrl: string (use "/images/gallery/[item-name].jpg" format) }}
-- navigation: object {{ menuItems: array of objects {{ name: string, href: string, description: string }}, socialLinks: object {{ facebook: string (if mentioned), instagram: string (if mentioned), twitter: string (if mentioned), website: string (if mentioned) }} }}
-- designSystem: object {{ colorPalette: object {{ primary: string, secondary: string, accent: string, background: string, text: string, muted: string }}, typography: object {{ headingFont: string, bodyFont: string, sizes: object {{ h1: string, h2: string, h3: string, body: string }} }}, brandPersona: string, logo: object {{ text: string, tagline: string }} }}
-- siteSettings: object {{ title: string, description: string, keywords: array of strings, favicon: string, ogImage: string }}
+DATA_EXTRACTION_SYSTEM_PROMPT = '''
+You are a data analyst.
+A local artisan will describe their business. Extract structured data for their website.
+Field formats are given by the response schema.
 
 Important:
 - If contact info is not provided, generate professional contact details using the business name
@@ -22,66 +21,99 @@ Important:
 - For colorPalette, choose colors that match the artisan's style/products mentioned
 - For typography, select Google Fonts that match the brand personality
 - Generate 4-6 products minimum and 6-8 gallery items minimum
-- All imageUrl paths should follow the specified format
 - Include realistic social media handles based on business name
 - Generate SEO-friendly keywords related to the business
 '''
 
-NAVBAR_COMPONENT_PROMPT = '''
-You are an expert React + TypeScript + Tailwind developer.
-
-Create a responsive Navbar component that:
-- Takes artisanInfo, navigation, and designSystem as props
-- Uses navigation.menuItems for menu links
-- Displays artisanInfo.name as logo/brand
-- Uses designSystem.colorPalette for styling
-- Uses designSystem.typography.headingFont for brand text
-- Includes mobile hamburger menu
-- Uses Next.js Link component for navigation
-- Has proper TypeScript interfaces
-- Is fully responsive
+DATA_EXTRACTION_PROMPT = '''
+A local artisan has provided a description of their business:
+"{description}"
+'''
 
-Constraints:
-- Import Link from "next/link"
-- Use only Tailwind CSS for styling
-- No external UI libraries
-- Return only valid TSX code
-- No comments, no markdown
-- DO NOT ADD ``` fences at the start or end
+def _object(properties: dict, optional: tuple = ()) -> dict:
+    return {
+        "type": "OBJECT",
+        "properties": properties,
+        "required": [name for name in properties if name not in optional],
+    }
 
-Input:
-{site_data}
-'''
+def _strings(*names: str, optional: tuple = (), descriptions: dict = None) -> dict:
+    # Format hints live in schema descriptions instead of being restated in the prompt
+    descriptions = descriptions or {}
+    return _object({
+        name: {"type": "STRING", "description": descriptions[name]} if name in descriptions else {"type": "STRING"}
+        for name in names
+    }, optional)
 
-FOOTER_COMPONENT_PROMPT = '''
-You are an expert React + TypeScript + Tailwind developer.
+def _array(items: dict) -> dict:
+    return {"type": "ARRAY", "items": items}
 
-Create a Footer component that:
-- Takes artisanInfo, navigation, and designSystem as props
-- Displays business name, contact info, and address
-- Shows social media links from navigation.socialLinks
-- Uses navigation.menuItems for footer links
-- Uses designSystem.colorPalette for styling
-- Uses designSystem.typography for fonts
-- Includes copyright notice with current year
-- Has multiple columns layout on desktop
+# Response schema for DATA_EXTRACTION_PROMPT; Gemini constrains decoding to it
+SITE_DATA_SCHEMA = _object({
+    "artisanInfo": _strings("name", "story", "contact", "address", "phone", descriptions={
+        "contact": 'Email/phone if mentioned, otherwise "contact@[businessname].com"',
+        "address": "Address if mentioned, otherwise a realistic generated one",
+        "phone": 'Phone if mentioned, otherwise formatted like "+1-XXX-XXX-XXXX"',
+    }),
+    "products": _array(_strings("id", "name", "description", "price", "category", "imageUrl", descriptions={
+        "imageUrl": '"/images/products/[product-name].jpg"',
+    })),
+    "galleryItems": _array(_strings("id", "name", "description", "imageUrl", descriptions={
+        "imageUrl": '"/images/gallery/[item-name].jpg"',
+    })),
+    "navigation": _object({
+        "menuItems": _array(_strings("name", "href", "description")),
+        "socialLinks": _strings("facebook", "instagram", "twitter", "website", optional=("facebook", "instagram", "twitter", "website")),
+    }),
+    "designSystem": _object({
+        "colorPalette": _strings("primary", "secondary", "accent", "background", "text", "muted"),
+        "typography": _object({
+            "headingFont": {"type": "STRING"},
+            "bodyFont": {"type": "STRING"},
+            "sizes": _strings("h1", "h2", "h3", "body"),
+        }),
+        "brandPersona": {"type": "STRING"},
+        "logo": _strings("text", "tagline"),
+    }),
+    "siteSettings": _object({
+        "title": {"type": "STRING"},
+        "description": {"type": "STRING"},
+        "keywords": _array({"type": "STRING"}),
+        "favicon": {"type": "STRING"},
+        "ogImage": {"type": "STRING"},
+    }),
+})
 
-Constraints:
-- Import Link from "next/link"
-- Use only Tailwind CSS for styling
-- No external UI libraries
-- Return only valid TSX code
-- No comments, no markdown
-- DO NOT ADD ``` fences at the start or end
+# Per-component requirements, sent as the component data for REACT_COMPONENT_PROMPT
+COMPONENT_SPECS = {
+    "Navbar": {"requirements": [
+        "Takes artisanInfo, navigation, and designSystem as props",
+        "Uses navigation.menuItems for menu links",
+        "Displays artisanInfo.name as logo/brand in designSystem.typography.headingFont",
+        "Includes a mobile hamburger menu",
+    ]},
+    "Footer": {"requirements": [
+        "Takes artisanInfo, navigation, and designSystem as props",
+        "Displays business name, contact info, and address",
+        "Shows social media links from navigation.socialLinks",
+        "Uses navigation.menuItems for footer links",
+        "Includes copyright notice with current year",
+        "Has multiple columns layout on desktop",
+    ]},
+}
 
+# Site data prefix for the generation prompts below. It comes first so requests
+# can share a cached prefix, and it is dropped from the prompt when it already
+# lives in a Vertex AI context cache.
+SITE_DATA_PROMPT = '''
 Input:
 {site_data}
 '''
 
-REACT_COMPONENT_PROMPT = '''
+REACT_COMPONENT_SYSTEM_PROMPT = '''
 You are an expert React + TypeScript + Tailwind developer.
 
-Create a {component_name} component that:
+Create the requested component that:
 - Uses data from the provided site data
 - Takes appropriate props (artisanInfo, products, galleryItems, designSystem, navigation as needed)
 - Uses designSystem.colorPalette for all colors
@@ -101,17 +133,17 @@ Constraints:
 - Code must be a single valid .tsx file
 - No markdown, no comments
 - DO NOT ADD ``` fences at the start or end
+'''
 
-Input:
-{site_data}
+REACT_COMPONENT_PROMPT = '''
 Component: {component_name}
 Component data: {component_data}
 '''
 
-REACT_PAGE_PROMPT = '''
+REACT_PAGE_SYSTEM_PROMPT = '''
 You are an expert Next.js developer.
 
-Create a {page_name} page that:
+Create the requested page that:
 - Loads site data from "@/data/products.json"
 - Uses artisanInfo, products, galleryItems, designSystem, and navigation from imported data
 - Uses designSystem.colorPalette for styling
@@ -128,13 +160,13 @@ Constraints:
 - Return only valid TypeScript/TSX code
 - No comments, no markdown
 - DO NOT ADD ``` fences at the start or end
+'''
 
-Input:
-{site_data}
+REACT_PAGE_PROMPT = '''
 Page: {page_name}
 '''
 
-LAYOUT_PROMPT = '''
+LAYOUT_SYSTEM_PROMPT = '''
 You are an expert Next.js developer.
 
 Create a layout.tsx file that:
@@ -154,12 +186,13 @@ Constraints:
 - Return only valid TSX code
 - No comments or extra text
 - DO NOT ADD ``` fences at the start or end
+'''
 
-Input:
-{site_data}
+LAYOUT_PROMPT = '''
+File: src/app/layout.tsx
 '''
 
-GLOBALS_CSS_PROMPT = '''
+GLOBALS_CSS_SYSTEM_PROMPT = '''
 You are a TailwindCSS expert.
 
 Create a globals.css file that:
@@ -177,7 +210,51 @@ Constraints:
 - Return only valid CSS
 - No comments or markdown
 - DO NOT ADD ``` fences at the start or end
+'''
 
+GLOBALS_CSS_PROMPT = '''
 Input:
 {design_system}
 '''
+
+SITE_BATCH_SYSTEM_PROMPT = '''
+You are an expert Next.js + React + TypeScript + Tailwind developer.
+
+Generate every requested file for a Next.js App Router website built from the site data.
+Return a single JSON object whose keys are exactly the file names requested and whose values are the complete contents of each file.
+
+Components (src/components/*.tsx):
+- Take appropriate props (artisanInfo, products, galleryItems, designSystem, navigation as needed)
+- Define explicit prop types (interface)
+- Navbar includes a mobile hamburger menu; Footer shows contact info, social links and a copyright notice
+
+Pages (src/app/**/page.tsx):
+- Load site data only from "@/data/products.json"
+- Only import components that exist: ProductCard, Navbar, Footer, ContactForm
+- Fully responsive and accessible, with proper SEO metadata
+
+Layout (src/app/layout.tsx):
+- Import Google Fonts (Playfair_Display and Montserrat) with static variable names "--font-heading" and "--font-body"
+- Set metadata from siteSettings and pass artisanInfo, designSystem and navigation as props to Navbar and Footer
+
+Globals (src/app/globals.css):
+- Start with: @tailwind base; @tailwind components; @tailwind utilities;
+- Define --color-* variables for designSystem.colorPalette and --font-heading / --font-body in :root
+
+Constraints for every file:
+- Use designSystem.colorPalette for all colors and designSystem.typography for fonts
+- Use Next.js conventions: Link from "next/link", Image from "next/image"
+- Only import from "next/*", "react", "@/components", or "@/data"
+- Use only Tailwind CSS for styling; no external UI libraries
+- No comments, no markdown, no ``` fences inside the values
+'''
+
+SITE_BATCH_PROMPT = '''
+Files:
+{targets}
+'''
+
+# Appended to a file's prompt when its previous output failed validation
+REPAIR_PROMPT = '''
+Your previous output for this file was rejected ({problem}). Return the complete, syntactically valid file.
+'''
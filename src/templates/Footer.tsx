@@ -0,0 +1,61 @@
+import Link from "next/link";
+
+interface FooterProps {
+  artisanInfo: { name: string; contact: string; address: string; phone: string };
+  navigation: {
+    menuItems: { name: string; href: string }[];
+    socialLinks: Record<string, string | undefined>;
+  };
+  designSystem: { colorPalette: { primary: string; background: string; muted: string } };
+}
+
+export default function Footer({ artisanInfo, navigation, designSystem }: FooterProps) {
+  const { colorPalette } = designSystem;
+  const socialLinks = Object.entries(navigation.socialLinks || {}).filter(([, href]) => href);
+
+  return (
+    <footer style={{ backgroundColor: colorPalette.primary, color: colorPalette.background }}>
+      <div className="mx-auto grid max-w-7xl gap-8 px-4 py-12 sm:px-6 md:grid-cols-3 lg:px-8">
+        <div className="space-y-1">
+          <h3 className="mb-4 text-xl font-bold" style={{ fontFamily: "var(--font-heading)" }}>
+            {artisanInfo.name}
+          </h3>
+          <p>{artisanInfo.address}</p>
+          <p>{artisanInfo.phone}</p>
+          <p>{artisanInfo.contact}</p>
+        </div>
+        <div>
+          <h3 className="mb-4 text-lg font-semibold" style={{ fontFamily: "var(--font-heading)" }}>
+            Explore
+          </h3>
+          <ul className="space-y-2">
+            {navigation.menuItems.map((item) => (
+              <li key={item.href}>
+                <Link href={item.href} className="hover:underline">
+                  {item.name}
+                </Link>
+              </li>
+            ))}
+          </ul>
+        </div>
+        <div>
+          <h3 className="mb-4 text-lg font-semibold" style={{ fontFamily: "var(--font-heading)" }}>
+            Follow
+          </h3>
+          <ul className="space-y-2">
+            {socialLinks.map(([name, href]) => (
+              <li key={name}>
+                <a href={href} target="_blank" rel="noopener noreferrer" className="capitalize hover:underline">
+                  {name}
+                </a>
+              </li>
+            ))}
+          </ul>
+        </div>
+      </div>
+      <div className="border-t py-4 text-center text-sm" style={{ borderColor: colorPalette.muted }}>
+        © {new Date().getFullYear()} {artisanInfo.name}. All rights reserved.
+      </div>
+    </footer>
+  );
+}
@@ -0,0 +1,61 @@
+"use client";
+
+import { useState } from "react";
+import Link from "next/link";
+
+interface MenuItem {
+  name: string;
+  href: string;
+}
+
+interface NavbarProps {
+  artisanInfo: { name: string };
+  navigation: { menuItems: MenuItem[] };
+  designSystem: {
+    colorPalette: { primary: string; background: string; text: string };
+    logo?: { text: string };
+  };
+}
+
+export default function Navbar({ artisanInfo, navigation, designSystem }: NavbarProps) {
+  const [open, setOpen] = useState(false);
+  const { colorPalette } = designSystem;
+  const brand = designSystem.logo?.text || artisanInfo.name;
+
+  return (
+    <nav className="sticky top-0 z-50 border-b" style={{ backgroundColor: colorPalette.background, color: colorPalette.text }}>
+      <div className="mx-auto flex max-w-7xl items-center justify-between px-4 py-4 sm:px-6 lg:px-8">
+        <Link href="/" className="text-2xl font-bold" style={{ fontFamily: "var(--font-heading)", color: colorPalette.primary }}>
+          {brand}
+        </Link>
+        <div className="hidden gap-8 md:flex">
+          {navigation.menuItems.map((item) => (
+            <Link key={item.href} href={item.href} className="font-medium transition-opacity hover:opacity-70">
+              {item.name}
+            </Link>
+          ))}
+        </div>
+        <button
+          type="button"
+          className="md:hidden"
+          aria-label="Toggle menu"
+          aria-expanded={open}
+          onClick={() => setOpen(!open)}
+        >
+          <svg className="h-6 w-6" fill="none" stroke="currentColor" strokeWidth={2} viewBox="0 0 24 24">
+            <path strokeLinecap="round" strokeLinejoin="round" d={open ? "M6 18L18 6M6 6l12 12" : "M4 6h16M4 12h16M4 18h16"} />
+          </svg>
+        </button>
+      </div>
+      {open && (
+        <div className="flex flex-col gap-2 px-4 pb-4 md:hidden">
+          {navigation.menuItems.map((item) => (
+            <Link key={item.href} href={item.href} className="py-2 font-medium" onClick={() => setOpen(false)}>
+              {item.name}
+            </Link>
+          ))}
+        </div>
+      )}
+    </nav>
+  );
+}
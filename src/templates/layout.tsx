@@ -0,0 +1,30 @@
+import type { Metadata } from "next";
+import type { ReactNode } from "react";
+import { Playfair_Display, Montserrat } from "next/font/google";
+import Navbar from "@/components/Navbar";
+import Footer from "@/components/Footer";
+import data from "@/data/products.json";
+import "./globals.css";
+
+const { artisanInfo, designSystem, navigation, siteSettings } = data;
+
+const headingFont = Playfair_Display({ subsets: ["latin"], variable: "--font-heading" });
+const bodyFont = Montserrat({ subsets: ["latin"], variable: "--font-body" });
+
+export const metadata: Metadata = {
+  title: siteSettings.title,
+  description: siteSettings.description,
+  keywords: siteSettings.keywords,
+};
+
+export default function RootLayout({ children }: { children: ReactNode }) {
+  return (
+    <html lang="en" className={`${headingFont.variable} ${bodyFont.variable}`}>
+      <body className="flex min-h-screen flex-col">
+        <Navbar artisanInfo={artisanInfo} designSystem={designSystem} navigation={navigation} />
+        <main className="flex-1">{children}</main>
+        <Footer artisanInfo={artisanInfo} designSystem={designSystem} navigation={navigation} />
+      </body>
+    </html>
+  );
+}
@@ -1,158 +1,536 @@
-import os
+import hashlib
 import json
+import re
+import shutil
+import string
+import subprocess
+import asyncio
 import logging
+import random
+from collections import Counter
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+import httpx
+from google.genai import errors
+
+from src.ai_utils import (
+    async_client_session,
+    cache_stats,
+    call_gemini_async,
+    call_gemini_stream_async,
+    can_cache_context,
+    create_context_cache,
+    has_cached_response,
+    invalidate_cached_response,
+)
+from src.config import get_config
+from src.prompts import (
+    REACT_COMPONENT_PROMPT,
+    REACT_COMPONENT_SYSTEM_PROMPT,
+    COMPONENT_SPECS,
+    REACT_PAGE_PROMPT,
+    REACT_PAGE_SYSTEM_PROMPT,
+    LAYOUT_PROMPT,
+    LAYOUT_SYSTEM_PROMPT,
+    GLOBALS_CSS_PROMPT,
+    GLOBALS_CSS_SYSTEM_PROMPT,
+    MAX_OUTPUT_TOKENS,
+    REPAIR_PROMPT,
+    SITE_BATCH_PROMPT,
+    SITE_BATCH_SYSTEM_PROMPT,
+    SITE_DATA_PROMPT,
+)
 
 logger = logging.getLogger(__name__)
 
 class GenerationError(Exception):
     pass
 
+def _has_content(file_path: Path, data: bytes) -> bool:
+    """True when file_path already holds exactly data"""
+    try:
+        return file_path.stat().st_size == len(data) and file_path.read_bytes() == data
+    except FileNotFoundError:
+        return False
+
 def write_file_wrapper(file_path: Path, content: str):
-    """Write content to file"""
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    """Write content to file unless it already holds exactly that; the parent directory must already exist"""
+    data = content.encode("utf-8")
+    # Leaving unchanged files alone keeps their mtimes, so the dev server
+    # does not rebuild them and the download cache stays valid
+    if not _has_content(file_path, data):
+        file_path.write_bytes(data)
+
+# A response wrapped in one ``` fence with an optional language tag (tsx, css, ...)
+_FENCE_RE = re.compile(r"\A\s*```[\w-]*[^\S\n]*\n?(.*?)\n?```\s*\Z", re.DOTALL)
 
 def extract_code_from_string(text: str, language_hint: str = "tsx") -> str:
-    """Extract code from AI response (dummy passthrough)"""
-    return text.strip().removeprefix("```tsx").removeprefix("```").removesuffix("```").strip()
+    """Extract code from AI response, unwrapping a surrounding markdown fence if present"""
+    match = _FENCE_RE.match(text)
+    return (match.group(1) if match else text).strip()
+
+# Next.js renders these App Router files through their default export; components
+# may use named exports, which the prompts leave open
+ROUTE_FILES = {"page.tsx", "layout.tsx"}
+
+def find_syntax_problem(code: str, file_subpath: str) -> Optional[str]:
+    """Describe an obvious structural defect in generated code, or return None.
+
+    A cheap heuristic, not a parser: it catches responses cut off at the token
+    limit and stray fences without pulling in a TypeScript toolchain.
+    """
+    if "```" in code:
+        return "stray markdown fence"
+    # Quotes cannot be tracked reliably (JSX text is full of apostrophes), so
+    # count braces raw; a literal "{" in a string is rare next to truncation
+    if code.count("{") != code.count("}"):
+        return "unbalanced braces, likely truncated"
+    if Path(file_subpath).name in ROUTE_FILES and "export default" not in code:
+        return "missing default export"
+    return None
+
+class FileTask(NamedTuple):
+    name: str
+    file_subpath: str
+    prompt_template: str
+    system_prompt: str
+    language_hint: str = "tsx"
+    component_data: Dict = None
+    max_output_tokens: int = 8192
+    # Whether the prompt needs the site data prefix (globals.css only needs the design system)
+    uses_site_data: bool = True
+
+_EMPTY_JSON = "{}"
+
+COMPONENTS = {
+    "Navbar": "src/components/Navbar.tsx",
+    "Footer": "src/components/Footer.tsx",
+    "ProductCard": "src/components/ProductCard.tsx",
+    "ContactForm": "src/components/ContactForm.tsx",
+}
+PAGES = {
+    "homepage": "src/app/page.tsx",
+    "products": "src/app/products/page.tsx",
+    "about": "src/app/about/page.tsx",
+    "gallery": "src/app/gallery/page.tsx",
+    "contact": "src/app/contact/page.tsx",
+}
+
+# Transient failures are retried with exponential backoff and full jitter, so
+# concurrent calls that fail together do not all retry at the same moment
+MAX_ATTEMPTS = 4
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and network failures are transient; anything else would fail again"""
+    if isinstance(error, errors.APIError):
+        return error.code == 429 or error.code >= 500
+    return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Back off exponentially with full jitter, waiting at least as long as a Retry-After header asks"""
+    jitter = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        retry_after = float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return jitter
+    # Calls rejected by the same 429 share the header value; the jitter spreads them out
+    return min(retry_after + jitter, BACKOFF_MAX_SECONDS)
+
+# Artifacts with a fixed structure are rendered from src/templates instead of
+# generated. The TSX templates read site data at runtime from products.json;
+# globals.css gets the color palette substituted as $primary, $secondary, ...
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+STATIC_TEMPLATES = {
+    "Navbar": "Navbar.tsx",
+    "Footer": "Footer.tsx",
+    "RootLayout": "layout.tsx",
+    "GlobalsCSS": "globals.css",
+}
+# Project files copied verbatim so `npm install` can start before any code is generated
+SCAFFOLD_DIR = TEMPLATES_DIR / "scaffold"
+# Records the digest of the inputs behind the last complete generation in output_path
+INPUTS_MARKER = ".webgen.sha256"
+PALETTE_KEYS = ("primary", "secondary", "accent", "background", "text", "muted")
+
+# Formulaic artifacts that Config.fast_model handles well; everything else uses Config.model
+FAST_MODEL_ARTIFACTS = {"Navbar", "Footer", "ContactForm", "RootLayout", "GlobalsCSS"}
+
+# Top-level site_data keys each artifact's prompt relies on; anything not listed gets everything
+SITE_DATA_FIELDS = {
+    "Navbar": ("artisanInfo", "navigation", "designSystem"),
+    "Footer": ("artisanInfo", "navigation", "designSystem"),
+    "ProductCard": ("products", "designSystem"),
+    "ContactForm": ("artisanInfo", "designSystem"),
+    "products": ("products", "navigation", "designSystem"),
+    "about": ("artisanInfo", "navigation", "designSystem"),
+    "gallery": ("artisanInfo", "galleryItems", "designSystem"),
+    "contact": ("artisanInfo", "navigation", "designSystem"),
+    "RootLayout": ("artisanInfo", "navigation", "designSystem", "siteSettings"),
+}
+
+# Large enough for all files in a single structured response
+BATCH_MAX_OUTPUT_TOKENS = 65535
 
 class WebsiteGenerator:
-    def __init__(self, site_data_raw: str, user_prompt: str, output_path: Path, dry_run: bool = False, run_install: bool = True):
-        self.site_data_raw = site_data_raw
+    def __init__(self, site_data: Dict[str, Any], user_prompt: str, output_path: Path, dry_run: bool = False, run_install: bool = True, max_concurrency: int = None, batch: bool = False, use_templates: bool = True):
+        self.site_data = site_data
+        # Serialized once; embedded verbatim in every prompt and in products.json
+        self.site_data_raw = json.dumps(site_data, indent=2)
         self.user_prompt = user_prompt
         self.output_path = output_path
         self.dry_run = dry_run
         self.run_install = run_install
+        self.max_concurrency = max_concurrency or get_config().gemini_concurrency
+        # Trades per-file parallelism for a single request that sends site_data once
+        self.batch = batch
+        self.use_templates = use_templates
+        self._progress_callback = None
+        self._progress_total = 0
+        self._progress_done = 0
+        self._incomplete = False
+        # (model, system prompt) -> Vertex AI cached content holding it plus the site data
+        self._prompt_cache: Dict[tuple, str] = {}
+
+    async def _with_retries(self, attempt_call):
+        """Await attempt_call(), retrying transient failures with backoff"""
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                return await attempt_call()
+            except Exception as e:
+                if attempt == MAX_ATTEMPTS - 1 or not _is_retryable(e):
+                    raise
+                delay = _retry_delay(e, attempt)
+                logger.warning(f"AI call failed: {e}. Retrying in {delay:.1f}s ({attempt + 1}/{MAX_ATTEMPTS - 1})...")
+                await asyncio.sleep(delay)
+
+    async def _call_ai_with_retries(self, prompt: str, system_prompt: str, **kwargs) -> str:
+        """Call AI with retry logic.
+
+        Generation calls pass cache=True: a rerun with the same site data should
+        reproduce the same files, so the sampled response is reused on purpose.
+        """
+        return await self._with_retries(lambda: call_gemini_async(prompt, system_prompt, **kwargs))
+
+    async def _stream_ai_to_file(self, part_path: Path, prompt: str, system_prompt: str, **kwargs) -> str:
+        """Like _call_ai_with_retries, but write chunks to part_path as they arrive"""
+        async def attempt():
+            chunks = []
+            with part_path.open("wb") as f:
+                async for chunk in call_gemini_stream_async(prompt, system_prompt, **kwargs):
+                    chunks.append(chunk)
+                    f.write(chunk.encode("utf-8"))
+            return "".join(chunks)
 
-    def _call_ai_with_retries(self, prompt: str, system_prompt: str) -> str:
-        """Call AI with retry logic"""
-        from src.ai_utils import call_gemini
         try:
-            return call_gemini(prompt, system_prompt)
-        except Exception as e:
-            logger.warning(f"AI call failed: {e}. Retrying once...")
-            return call_gemini(prompt, system_prompt)
+            return await self._with_retries(attempt)
+        except BaseException:
+            # Also on cancellation: a half-written file must not end up in the site
+            part_path.unlink(missing_ok=True)
+            raise
 
-    def _install_dependencies(self, output_path: str, run_install: bool = True):
-        """Install project dependencies"""
-        if not run_install:
-            return
-        os.system(f"cd {output_path} && npm install")
+    def _project_site_data(self, name: str) -> Dict[str, Any]:
+        """Return only the parts of site_data the named artifact uses"""
+        fields = SITE_DATA_FIELDS.get(name)
+        if fields is None:
+            return self.site_data
+        return {key: self.site_data[key] for key in fields if key in self.site_data}
 
-    def generate(self) -> str:
-        # Save the raw AI site data
-        data_dir = self.output_path / "src" / "data"
-        write_file_wrapper(data_dir / "products.json", self.site_data_raw)
+    def _inputs_digest(self) -> str:
+        """Hash everything that determines the output: inputs, options, prompts, templates and this module"""
+        config = get_config()
+        digest = hashlib.sha256()
+        for part in (self.site_data_raw, self.user_prompt, config.model, config.fast_model, str(self.batch), str(self.use_templates)):
+            digest.update(part.encode("utf-8") + b"\0")
+        sources = [Path(__file__), Path(__file__).parent / "prompts.py"] + sorted(TEMPLATES_DIR.rglob("*"))
+        for path in sources:
+            if path.is_file():
+                digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def _file_done(self, description: str):
+        """Count one finished output file and report it to the progress callback"""
+        self._progress_done += 1
+        if self._progress_callback:
+            self._progress_callback(self._progress_done, self._progress_total, description)
+
+    def _render_static_templates(self, tasks: List[FileTask]) -> List[FileTask]:
+        """Write every task that has a static template; return the tasks still needing the model"""
+        palette = self.site_data.get("designSystem", {}).get("colorPalette", {})
+        values = {key: palette.get(key, "currentColor") for key in PALETTE_KEYS}
+        remaining = []
+        for task in tasks:
+            template = STATIC_TEMPLATES.get(task.name)
+            if template is None:
+                remaining.append(task)
+                continue
+            content = string.Template((TEMPLATES_DIR / template).read_text(encoding="utf-8")).safe_substitute(values)
+            write_file_wrapper(self.output_path / task.file_subpath, content)
+            self._file_done(f"Rendered {task.file_subpath}")
+        return remaining
 
-        # Lazy import to avoid circular issues
-        from src.prompts import (
-            REACT_COMPONENT_PROMPT,
-            REACT_PAGE_PROMPT,
-            LAYOUT_PROMPT,
-            GLOBALS_CSS_PROMPT,
+    def _model_for(self, task: FileTask) -> str:
+        config = get_config()
+        return config.fast_model if task.name in FAST_MODEL_ARTIFACTS else config.model
+
+    def _shared_prefixes(self, tasks: List[FileTask], site_data_prompt: str) -> set:
+        """(model, system prompt) pairs that several tasks send with the full site data"""
+        # Cached contents are tied to the model they were created for
+        shared = Counter((self._model_for(task), task.system_prompt) for task in tasks if task.uses_site_data)
+        return {key for key, count in shared.items() if count > 1 and can_cache_context(key[1], site_data_prompt)}
+
+    def _file_request(self, task: FileTask, design_system: str, site_data_prompt: str, shared: set) -> Tuple[str, Dict[str, Any]]:
+        """Return the prompt and call arguments for one file"""
+        model = self._model_for(task)
+        prompt = task.prompt_template.format(
+            component_name=task.name,
+            component_data=json.dumps(task.component_data) if task.component_data else _EMPTY_JSON,
+            description=self.user_prompt,
+            design_system=design_system,
+            page_name=task.name,
         )
+        context = None
+        if task.uses_site_data:
+            if (model, task.system_prompt) in shared:
+                context = site_data_prompt
+            else:
+                # Without a shared cached prefix there is nothing to gain from sending
+                # identical site data, so send only the fields this file needs
+                projected = json.dumps(self._project_site_data(task.name), indent=2)
+                prompt = SITE_DATA_PROMPT.format(site_data=projected) + prompt
+        return prompt, dict(system_prompt=task.system_prompt, max_output_tokens=task.max_output_tokens, cache=True, model=model, context=context)
 
-        def generate_and_write(name: str, file_subpath: str, prompt_template: str, system_prompt: str, language_hint: str = "tsx", component_data: Dict = None):
-            logger.info(f"Generating {name} -> {file_subpath}")
-            full_prompt = prompt_template.format(
-                site_data=self.site_data_raw,
-                component_name=name,
-                component_data=json.dumps(component_data or {}),
-                description=self.user_prompt,
-                design_system=json.dumps({}),
-                page_name=name,
-            )
-            ai_resp = self._call_ai_with_retries(prompt=full_prompt, system_prompt=system_prompt)
-            code = extract_code_from_string(ai_resp, language_hint)
-            if not code:
-                write_file_wrapper(self.output_path / (file_subpath + ".raw.txt"), ai_resp)
-                return
-            write_file_wrapper(self.output_path / file_subpath, code)
+    def _create_prompt_caches(self, requests: List[Tuple[str, Dict[str, Any]]], site_data_prompt: str) -> Dict[tuple, str]:
+        """Cache system prompt + site data once per shared prefix that a request still has to send.
 
-        # Components
-        components = {
-            "Navbar": "src/components/Navbar.tsx",
-            "Footer": "src/components/Footer.tsx",
-            "ProductCard": "src/components/ProductCard.tsx",
-            "ContactForm": "src/components/ContactForm.tsx",
+        Response-cache keys cover the prefix text, not the cache name, so a rerun
+        served entirely from the response cache uploads nothing.
+        """
+        pending = {
+            (request["model"], request["system_prompt"])
+            for prompt, request in requests
+            if request["context"] and not has_cached_response(prompt, **request)
         }
-        for name, path in components.items():
-            generate_and_write(name, path, REACT_COMPONENT_PROMPT, "React component generator")
+        caches = {}
+        for model, system_prompt in pending:
+            name = create_context_cache(system_prompt, site_data_prompt, model)
+            if name:
+                caches[model, system_prompt] = name
+        return caches
 
-        # Pages
-        pages = {
-            "homepage": "src/app/page.tsx",
-            "products": "src/app/products/page.tsx",
-            "about": "src/app/about/page.tsx",
-            "gallery": "src/app/gallery/page.tsx",
-            "contact": "src/app/contact/page.tsx",
+    async def _generate_batch(self, tasks: List[FileTask]) -> List[FileTask]:
+        """Generate all files with one structured request; return the tasks it did not cover"""
+        targets = "\n".join(f"- {task.name}: {task.file_subpath}" for task in tasks)
+        response_schema = {
+            "type": "OBJECT",
+            "properties": {task.name: {"type": "STRING"} for task in tasks},
+            "required": [task.name for task in tasks],
         }
-        for name, path in pages.items():
-            generate_and_write(name, path, REACT_PAGE_PROMPT, "Next.js page generator")
+        logger.info(f"Generating {len(tasks)} files in one batched request")
+        ai_resp = await self._call_ai_with_retries(
+            prompt=SITE_DATA_PROMPT.format(site_data=self.site_data_raw) + SITE_BATCH_PROMPT.format(targets=targets),
+            system_prompt=SITE_BATCH_SYSTEM_PROMPT,
+            max_output_tokens=BATCH_MAX_OUTPUT_TOKENS,
+            response_mime_type="application/json",
+            response_schema=response_schema,
+            cache=True,
+        )
+        try:
+            files = json.loads(ai_resp)
+        except (TypeError, ValueError) as e:
+            # Usually a response cut off at the token limit
+            logger.warning(f"Batched response was not valid JSON: {e}. Falling back to per-file generation")
+            return tasks
+        if not isinstance(files, dict):
+            return tasks
+
+        remaining = []
+        for task in tasks:
+            code = extract_code_from_string(files.get(task.name) or "", task.language_hint)
+            if code and not find_syntax_problem(code, task.file_subpath):
+                write_file_wrapper(self.output_path / task.file_subpath, code)
+                self._file_done(f"Generated {task.file_subpath}")
+            else:
+                remaining.append(task)
+        if remaining:
+            logger.info(f"Batched response missed {[task.name for task in remaining]}; generating them individually")
+        return remaining
+
+    def create_scaffolding_files(self):
+        """Write package.json and the Next.js / TypeScript / Tailwind config files"""
+        for source in SCAFFOLD_DIR.iterdir():
+            write_file_wrapper(self.output_path / source.name, source.read_text(encoding="utf-8"))
+
+    def _install_dependencies(self, output_path: str, run_install: bool = True):
+        """Start installing project dependencies in the background and return the process.
+
+        Returns None when there is nothing to install or npm is unavailable.
+        """
+        if not run_install or not (Path(output_path) / "package.json").exists():
+            return None
+        if not shutil.which("npm"):
+            logger.warning("npm not found on PATH; skipping dependency install")
+            return None
+        # npm ci skips dependency resolution when a lockfile is present, but it deletes
+        # node_modules first; once that exists, an incremental install is far cheaper
+        # and leaves a running dev server's modules in place
+        project = Path(output_path)
+        if (project / "package-lock.json").exists() and not (project / "node_modules").is_dir():
+            command = ["npm", "ci", "--prefer-offline", "--no-audit", "--no-fund", "--loglevel=error"]
+        else:
+            command = ["npm", "install", "--prefer-offline", "--no-audit", "--no-fund", "--loglevel=error"]
+        # Only errors reach stderr (--loglevel=error); progress output would interleave with the app log
+        return subprocess.Popen(command, cwd=output_path, stdout=subprocess.DEVNULL)
+
+    def generate(self, progress_callback=None) -> str:
+        """Write the site to output_path, calling progress_callback(done, total, description) per file"""
+        return asyncio.run(self.agenerate(progress_callback))
+
+    async def agenerate(self, progress_callback=None) -> str:
+        """Async variant of generate() for callers that already run an event loop"""
+        async with async_client_session():
+            return await self._agenerate(progress_callback)
+
+    async def _agenerate(self, progress_callback=None) -> str:
+        marker = self.output_path / INPUTS_MARKER
+        digest = self._inputs_digest()
+        if get_config().response_cache and marker.is_file() and marker.read_text(encoding="utf-8") == digest:
+            logger.info(f"Inputs unchanged since the last complete run; keeping {self.output_path}")
+            if progress_callback:
+                progress_callback(1, 1, "Site unchanged since the last run")
+            return str(self.output_path)
+        # A run that stops part-way must not leave a marker vouching for the old inputs
+        marker.unlink(missing_ok=True)
+
+        site_data_prompt = SITE_DATA_PROMPT.format(site_data=self.site_data_raw)
+        design_system = json.dumps(self.site_data.get("designSystem", {}), indent=2)
+
+        # Every file is an independent AI call, so issue them concurrently
+        # and bound the fan-out to stay within the provider's rate limits.
+        async def generate_all(tasks: List[FileTask]):
+            if self.batch:
+                tasks = await self._generate_batch(tasks)
+            shared = self._shared_prefixes(tasks, site_data_prompt)
+            requests = {task.name: self._file_request(task, design_system, site_data_prompt, shared) for task in tasks}
+            # Blocking, but runs before any request is in flight
+            self._prompt_cache = self._create_prompt_caches(list(requests.values()), site_data_prompt)
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def generate_and_write(task: FileTask):
+                logger.info(f"Generating {task.name} -> {task.file_subpath}")
+                full_prompt, request = requests[task.name]
+                # Without a context cache the shared prefix is sent inline
+                request = dict(request, cached_content=self._prompt_cache.get((request["model"], request["system_prompt"])))
+                # Stream into a .part file so disk writes overlap decoding; it only
+                # replaces the target once the response is complete
+                target = self.output_path / task.file_subpath
+                part = target.with_name(target.name + ".part")
+                prompt = full_prompt
+                for _ in range(2):
+                    async with semaphore:
+                        ai_resp = await self._stream_ai_to_file(part, prompt=prompt, **request)
+                    code = extract_code_from_string(ai_resp, task.language_hint)
+                    problem = code and find_syntax_problem(code, task.file_subpath)
+                    if not problem:
+                        break
+                    # A cached bad response would otherwise come back on every rerun
+                    invalidate_cached_response(prompt, **request)
+                    logger.warning(f"{task.file_subpath} failed validation: {problem}")
+                    prompt = full_prompt + REPAIR_PROMPT.format(problem=problem)
+                if not code:
+                    part.replace(self.output_path / (task.file_subpath + ".raw.txt"))
+                elif code == ai_resp:
+                    if _has_content(target, ai_resp.encode("utf-8")):
+                        part.unlink()
+                    else:
+                        part.replace(target)
+                else:
+                    write_file_wrapper(target, code)
+                    part.unlink()
+                if not code or problem:
+                    self._incomplete = True
+                self._file_done(f"Generated {task.file_subpath}" if code else f"No code returned for {task.file_subpath}")
+
+            # Let the other files finish when one exhausts its retries, then report every failure together
+            results = await asyncio.gather(*(generate_and_write(task) for task in tasks), return_exceptions=True)
+            # Cancellation and Streamlit's stop/rerun signals are not file failures
+            for result in results:
+                if isinstance(result, BaseException) and not isinstance(result, Exception):
+                    raise result
+            failures = [(task, result) for task, result in zip(tasks, results) if isinstance(result, Exception)]
+            if failures:
+                summary = "; ".join(f"{task.file_subpath}: {error}" for task, error in failures)
+                raise GenerationError(f"{len(failures)} of {len(tasks)} files failed to generate: {summary}") from failures[0][1]
+
+        # Components
+        tasks = [FileTask(name, path, REACT_COMPONENT_PROMPT, REACT_COMPONENT_SYSTEM_PROMPT, component_data=COMPONENT_SPECS.get(name), max_output_tokens=MAX_OUTPUT_TOKENS["component"]) for name, path in COMPONENTS.items()]
+
+        # Pages
+        tasks += [FileTask(name, path, REACT_PAGE_PROMPT, REACT_PAGE_SYSTEM_PROMPT, max_output_tokens=MAX_OUTPUT_TOKENS["page"]) for name, path in PAGES.items()]
 
         # Layout and globals
-        generate_and_write("RootLayout", "src/app/layout.tsx", LAYOUT_PROMPT, "Next.js layout generator")
-        generate_and_write("GlobalsCSS", "src/app/globals.css", GLOBALS_CSS_PROMPT, "CSS globals generator", language_hint="css")
+        tasks.append(FileTask("RootLayout", "src/app/layout.tsx", LAYOUT_PROMPT, LAYOUT_SYSTEM_PROMPT, max_output_tokens=MAX_OUTPUT_TOKENS["layout"]))
+        tasks.append(FileTask("GlobalsCSS", "src/app/globals.css", GLOBALS_CSS_PROMPT, GLOBALS_CSS_SYSTEM_PROMPT, language_hint="css", max_output_tokens=MAX_OUTPUT_TOKENS["globals_css"], uses_site_data=False))
+
+        # Create every output directory once up front instead of on each write
+        data_dir = self.output_path / "src" / "data"
+        for directory in {data_dir} | {(self.output_path / task.file_subpath).parent for task in tasks}:
+            directory.mkdir(parents=True, exist_ok=True)
+
+        # Save the raw AI site data
+        write_file_wrapper(data_dir / "products.json", self.site_data_raw)
+        self.create_scaffolding_files()
+
+        # Overlap the install with AI generation instead of running it afterwards
+        install = None if self.dry_run else self._install_dependencies(str(self.output_path), run_install=self.run_install)
+
+        self._progress_callback = progress_callback
+        self._progress_total = len(tasks)
+        self._progress_done = 0
+        self._incomplete = False
+        stats_before = cache_stats()
+
+        try:
+            if self.use_templates:
+                tasks = self._render_static_templates(tasks)
+            await generate_all(tasks)
+        except BaseException:
+            if install:
+                # Otherwise it keeps running and races the next run's install in the same directory
+                install.terminate()
+                install.wait()
+            raise
+        # Counters are process-wide, so concurrent sessions can skew these slightly
+        stats = {name: count - stats_before[name] for name, count in cache_stats().items()}
+        logger.info(f"Response cache this run: {stats['hits']} hits, {stats['misses']} misses")
 
         if not self.dry_run:
             print(f"Website generated at: {self.output_path}")
-            #   self._install_dependencies(str(self.output_path), run_install=self.run_install)
+        installed = install is None or await asyncio.to_thread(install.wait) == 0
+        if not installed:
+            logger.warning(f"Dependency install exited with code {install.returncode}")
+        # An unchanged rerun returns before installing, so only vouch for a complete site
+        if not self._incomplete and installed:
+            write_file_wrapper(marker, digest)
 
         return str(self.output_path)
 
 
-def generate_website_files(site_data_raw: str, user_prompt: str, output_path: str, dry_run: bool = False, run_install: bool = True, progress_callback=None) -> str:
+def generate_website_files(site_data: Dict[str, Any], user_prompt: str, output_path: str, dry_run: bool = False, run_install: bool = True, progress_callback=None, batch: bool = False) -> str:
     """Generate website files with optional progress tracking."""
-    
-    # Define the steps for website generation
-    total_steps = 6  # Adjust based on your actual steps
-    current_step = 0
-    
-    def update_progress(description):
-        nonlocal current_step
-        current_step += 1
-        if progress_callback:
-            progress_callback(current_step, total_steps, description)
-    
+    generator = WebsiteGenerator(
+        site_data=site_data,
+        user_prompt=user_prompt,
+        output_path=Path(output_path),
+        dry_run=dry_run,
+        run_install=run_install,
+        batch=batch
+    )
     try:
-        generator = WebsiteGenerator(
-            site_data_raw=site_data_raw,
-            user_prompt=user_prompt,
-            output_path=Path(output_path),
-            dry_run=dry_run,
-            run_install=run_install
-        )
-        
-        # Step 1: Generate HTML files
-        update_progress("Generating templates...")
-        # Your HTML generation code here
-        
-        # Step 2: Generate CSS files
-        update_progress("Creating stylesheets...")
-        # Your CSS generation code here
-        
-        # Step 3: Generate JavaScript files
-        update_progress("Building interactive components...")
-        # Your JS generation code here
-        
-        # Step 4: Generate configuration files
-        update_progress("Setting up project configuration...")
-        # Your config generation code here
-        
-        # Step 5: Copy assets and dependencies
-        update_progress("Creating Layout...")
-        # Your asset copying code here
-        
-        # Step 6: Final cleanup
-        update_progress("Finalizing project structure...")
-        # Your cleanup code here
-        
-        return output_path
-        
+        return generator.generate(progress_callback=progress_callback)
     except Exception as e:
         if progress_callback:
-            progress_callback(current_step, total_steps, f"Error: {str(e)}")
+            progress_callback(generator._progress_done, generator._progress_total, f"Error: {str(e)}")
         raise